@@ -1,10 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
 import streamlit.components.v1 as components
 from datetime import datetime
 import json
+import orjson
 import re
 import os
+import pickle
+import io
+import collections
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import NamedTuple
 
 # Version 1.2 - Fully fixed indentation and features
 # --- Page Configuration ---
@@ -37,7 +49,6 @@ if os.path.exists(original_img_path):
         img = Image.open(original_img_path)
         img_rotated = img.rotate(-90, expand=True)
         # Save to bytes
-        import io
         img_buffer = io.BytesIO()
         img_rotated.save(img_buffer, format='JPEG', quality=85)
         img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
@@ -53,46 +64,72 @@ if os.path.exists(original_img_path):
 # Create tabs for better organization
 tab1, tab2, tab3, tab4 = st.tabs(["📝 Data Entry", "🕸️ Family Tree", "📊 Statistics", "ℹ️ Help"])
 
+def _hash_dataframe(d):
+    """Cache key for a dataframe argument: column labels, dtypes and every cell"""
+    try:
+        cells = pd.util.hash_pandas_object(d, index=True).values.tobytes()
+    except TypeError:
+        # List- or dict-valued cells (e.g. from an uploaded JSON) cannot be hashed per row
+        cells = pickle.dumps(d)
+    return tuple(d.columns), tuple(map(str, d.dtypes)), cells
+
+# Hash dataframes by their full contents when used as st.cache_data arguments
+_DF_HASH_FUNCS = {pd.DataFrame: _hash_dataframe}
+
 # --- 1. Load and Transform Family Data from JSON ---
+_LIFESPAN_FULL = re.compile(r'(\d{4})\s*[-–]\s*(\d{4}|\?)?')
+_LIFESPAN_YEAR = re.compile(r'(\d{4})')
+# Line and block comments in one alternation; the newline ending a line comment is kept
+_JSON_COMMENTS = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+
 def parse_lifespan(lifespan_str):
     """Parse lifespan string like '1850-1914' or '1975-' into birth and death years"""
     if not lifespan_str or lifespan_str == "?":
         return None, None
 
     lifespan_str = str(lifespan_str).strip()
-    match = re.match(r'(\d{4})\s*[-–]\s*(\d{4}|\?)?', lifespan_str)
+    match = _LIFESPAN_FULL.match(lifespan_str)
     if match:
         birth = int(match.group(1)) if match.group(1) else None
         death = int(match.group(2)) if match.group(2) and match.group(2) != '?' else None
         return birth, death
 
-    match = re.match(r'(\d{4})', lifespan_str)
+    match = _LIFESPAN_YEAR.match(lifespan_str)
     if match:
         return int(match.group(1)), None
 
     return None, None
 
 
-def infer_gender(name, spouse_info=None):
-    """Infer gender from name patterns or spouse description"""
-    male_patterns = [
-        'Yosef', 'Moshe', 'Haim', 'David', 'Itzchak', 'Jack', 'Jacques',
-        'Allen', 'Herbert', 'Alberto', 'Nathan', 'Samuel', 'Benjamin',
-        'Jacob', 'Abraham', 'Isaac', 'Aaron', 'Daniel', 'Michael', 'Robert',
-        'Ephraim', 'Elia', 'Eli', 'Alan', 'Leonard', 'Eddie', 'Alon', 'Eitan'
-    ]
+# Given-name patterns, lowercased once; matched as substrings of the full name
+_MALE_PATTERNS = tuple(pattern.lower() for pattern in [
+    'Yosef', 'Moshe', 'Haim', 'David', 'Itzchak', 'Jack', 'Jacques',
+    'Allen', 'Herbert', 'Alberto', 'Nathan', 'Samuel', 'Benjamin',
+    'Jacob', 'Abraham', 'Isaac', 'Aaron', 'Daniel', 'Michael', 'Robert',
+    'Ephraim', 'Elia', 'Eli', 'Alan', 'Leonard', 'Eddie', 'Alon', 'Eitan'
+])
+_MALE_TOKENS = frozenset(_MALE_PATTERNS)
+
+_FEMALE_PATTERNS = tuple(pattern.lower() for pattern in [
+    'Rivka', 'Ester', 'Matilda', 'Sara', 'Rachel', 'Bella', 'Gloria',
+    'Wendy', 'Rebecca', 'Miriam', 'Hannah', 'Sarah', 'Ruth', 'Naomi',
+    'Esther', 'Leah', 'Deborah', 'Susan', 'Linda', 'Nancy', 'Elizabeth',
+    'Becki', 'Joyce', 'Marlene', 'Eram'
+])
 
-    female_patterns = [
-        'Rivka', 'Ester', 'Matilda', 'Sara', 'Rachel', 'Bella', 'Gloria',
-        'Wendy', 'Rebecca', 'Miriam', 'Hannah', 'Sarah', 'Ruth', 'Naomi',
-        'Esther', 'Leah', 'Deborah', 'Susan', 'Linda', 'Nancy', 'Elizabeth',
-        'Becki', 'Joyce', 'Marlene', 'Eram'
-    ]
 
+# Deterministic in its inputs, and first names and spouse notes repeat across the family
+@functools.lru_cache(maxsize=1024)
+def infer_gender(name, spouse_info=None):
+    """Infer gender from name patterns or spouse description"""
     name_lower = name.lower() if name else ""
-    if any(pattern.lower() in name_lower for pattern in male_patterns):
+    tokens = name_lower.split()
+    # Male patterns win over female ones, so only a male first name can short-circuit
+    if tokens and tokens[0] in _MALE_TOKENS:
         return "Male"
-    if any(pattern.lower() in name_lower for pattern in female_patterns):
+    if any(pattern in name_lower for pattern in _MALE_PATTERNS):
+        return "Male"
+    if any(pattern in name_lower for pattern in _FEMALE_PATTERNS):
         return "Female"
 
     spouse_text = str(spouse_info).lower() if spouse_info else ""
@@ -104,47 +141,75 @@ def infer_gender(name, spouse_info=None):
     return "Unknown"
 
 
+@st.cache_data(show_spinner=False)
+def _load_family_data_cached(json_path, mtime):
+    """Parse and transform the JSON file; mtime ties the cached result to the file version"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        try:
+            json_data = json.load(f)
+        except json.JSONDecodeError:
+            # Hand-commented file: strip // and /* */ comments, then parse the stripped text
+            f.seek(0)
+            json_data = json.loads(_JSON_COMMENTS.sub('', f.read()))
+
+    # Parents normally precede their children, so names resolve as records are read
+    id_to_name = {}
+    transformed = []
+    forward_refs = []
+    for person in json_data:
+        id_to_name[person['id']] = person['name']
+        parent_id = person.get('parent_id')
+        if parent_id and parent_id not in id_to_name:
+            forward_refs.append((len(transformed), parent_id))
+        transformed.append(_transform_person(person, id_to_name.get(parent_id) if parent_id else None))
+
+    # Children listed before their parent are resolved once every id is known
+    for position, parent_id in forward_refs:
+        transformed[position]["Parent"] = id_to_name.get(parent_id)
+    return transformed
+
+
+def _transform_person(person, parent_name):
+    """Map one JSON person record onto the editor's row schema"""
+    birth, death = parse_lifespan(person.get('lifespan', ''))
+    spouse = person.get('spouse')
+    gender = infer_gender(person.get('name', ''), spouse)
+    return {
+        "Name": person.get('name'),
+        "Parent": parent_name,
+        "Birth": birth,
+        "Death": death,
+        "Location": person.get('location', 'Unknown'),
+        "Gender": gender,
+        "Spouse": spouse,
+        "Occupation": person.get('occupation'),
+        "Photo": person.get('photo'),
+        "Generation": person.get('generation', 1),
+        "Highlight": person.get('highlighted', False),
+        "Notes": person.get('note', '')
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_family_df(json_path, mtime):
+    """The bundled tree as one DataFrame per file version, shared by every session.
+    Never edit it in place: sessions only ever receive a .copy() of it."""
+    return pd.DataFrame(_load_family_data_cached(json_path, mtime))
+
+
 def load_family_data_from_json():
-    """Load and transform family data from JSON file"""
+    """Load and transform family data from JSON file into a DataFrame this session owns"""
     json_path = "family_data.json"
     if not os.path.exists(json_path):
         st.warning(f"JSON file not found at: {os.path.abspath(json_path)}")
-        return create_sample_data()
+        return pd.DataFrame(create_sample_data())
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            content = re.sub(r'//.*?\n', '\n', content)
-            content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-            json_data = json.loads(content)
-
-        id_to_name = {person['id']: person['name'] for person in json_data}
-        transformed = []
-        for person in json_data:
-            birth, death = parse_lifespan(person.get('lifespan', ''))
-            parent_name = id_to_name.get(person.get('parent_id')) if person.get('parent_id') else None
-            spouse = person.get('spouse')
-            gender = infer_gender(person.get('name', ''), spouse)
-            transformed.append({
-                "Name": person.get('name'),
-                "Parent": parent_name,
-                "Birth": birth,
-                "Death": death,
-                "Location": person.get('location', 'Unknown'),
-                "Gender": gender,
-                "Spouse": spouse,
-                "Occupation": person.get('occupation'),
-                "Photo": person.get('photo'),
-                "Generation": person.get('generation', 1),
-                "Highlight": person.get('highlighted', False),
-                "Notes": person.get('note', '')
-            })
-
-        return transformed
+        return _shared_family_df(json_path, os.path.getmtime(json_path)).copy()
 
     except Exception as e:
         st.error(f"Error loading JSON file: {str(e)}")
-        return create_sample_data()
+        return pd.DataFrame(create_sample_data())
 
 
 def create_sample_data():
@@ -167,46 +232,86 @@ def create_sample_data():
     ]
 
 
+def birth_by_name(df):
+    """Birth year keyed by name, taken from the first member with each name"""
+    # Slices just the Name and Birth columns
+    first = ~df['Name'].duplicated()
+    return df['Birth'][first].set_axis(df['Name'][first])
+
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
 def validate_dates(df):
     """Validate date consistency in family tree"""
+    cols = df.reindex(columns=['Name', 'Parent', 'Birth', 'Death'])
+    cols['Birth'] = pd.to_numeric(cols['Birth'], errors='coerce')
+    cols['Death'] = pd.to_numeric(cols['Death'], errors='coerce')
+
+    # Birth year of each row's parent (first member with that name); comparisons
+    # against missing years are False, so no separate notna checks are needed
+    parent_birth = cols['Parent'].map(birth_by_name(cols)).where(cols['Parent'].notna())
+    bad_death = cols['Death'] < cols['Birth']
+    young_parent = cols['Birth'] < parent_birth + 15
+
     errors = []
-    for _, row in df.iterrows():
-        if pd.notna(row.get('Birth')) and pd.notna(row.get('Death')):
-            if row['Death'] < row['Birth']:
-                errors.append(f"❌ {row['Name']}: Death year ({row['Death']}) precedes birth year ({row['Birth']})")
-
-        if pd.notna(row.get('Parent')) and pd.notna(row.get('Birth')):
-            parent_rows = df[df['Name'] == row['Parent']]
-            if not parent_rows.empty:
-                parent_birth = parent_rows.iloc[0].get('Birth')
-                if pd.notna(parent_birth) and row['Birth'] < parent_birth + 15:
-                    errors.append(f"⚠️ {row['Name']}: Born when parent was under 15 years old")
+    flagged = bad_death | young_parent
+    for name, birth, death, is_bad_death, is_young_parent in zip(
+        cols['Name'][flagged], cols['Birth'][flagged], cols['Death'][flagged],
+        bad_death[flagged], young_parent[flagged]
+    ):
+        if is_bad_death:
+            errors.append(f"❌ {name}: Death year ({death}) precedes birth year ({birth})")
+        if is_young_parent:
+            errors.append(f"⚠️ {name}: Born when parent was under 15 years old")
     return errors
 
 
+def build_children_index(df):
+    """Map each parent name to the list of its children's names, in row order"""
+    children = collections.defaultdict(list)
+    for parent, name in zip(df['Parent'], df['Name']):
+        if pd.notna(parent):
+            children[parent].append(name)
+    return dict(children)
+
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
 def calculate_generation(df):
     """Automatically calculate generation levels"""
-    generation_map = {}
+    children = build_children_index(df)
     roots = df[df['Parent'].isna() | (df['Parent'] == '')]['Name'].tolist()
-    for root in roots:
-        generation_map[root] = 1
-
-    changed = True
-    while changed:
-        changed = False
-        for _, row in df.iterrows():
-            parent = row.get('Parent')
-            name = row.get('Name')
-            if name not in generation_map and parent in generation_map:
-                generation_map[name] = generation_map[parent] + 1
-                changed = True
+    generation_map = {root: 1 for root in roots}
+
+    # Breadth-first from the roots, so each name gets its shallowest level
+    queue = collections.deque(generation_map)
+    while queue:
+        parent = queue.popleft()
+        for child in children.get(parent, ()):
+            if child not in generation_map:
+                generation_map[child] = generation_map[parent] + 1
+                queue.append(child)
     return generation_map
 
 
-# Load initial data and seed session state
-initial_data = load_family_data_from_json()
+@st.cache_data(max_entries=16, show_spinner=False)
+def sorted_member_names(names):
+    """Sorted unique member names for the Quick Add parent dropdown, keyed on the
+    names alone so edits to other columns still hit the cache"""
+    return sorted(set(names))
+
+
+# Rows per page in the read-only Data Entry table
+_TABLE_PAGE_SIZE = 100
+
+
+def commit_table_edits():
+    """Keep the data editor's changes when Edit mode is switched off"""
+    if 'edited_df' in st.session_state:
+        st.session_state.df = st.session_state.pop('edited_df')
+
+
+# Seed session state; the JSON is only read (from the shared cache) when a session starts
 if 'df' not in st.session_state:
-    st.session_state.df = pd.DataFrame(initial_data)
+    st.session_state.df = load_family_data_from_json()
 if 'first_run' not in st.session_state:
     st.session_state.first_run = True
 if 'update_viz' not in st.session_state:
@@ -214,9 +319,49 @@ if 'update_viz' not in st.session_state:
 
 st.sidebar.markdown("---")
 if st.sidebar.button("🔄 Reload Original Data"):
-    st.session_state.df = pd.DataFrame(load_family_data_from_json())
+    _load_family_data_cached.clear()
+    _shared_family_df.clear()
+    st.session_state.df = load_family_data_from_json()
     st.rerun()
 
+
+@st.fragment
+def render_quick_add():
+    """Quick Add form; submitting it reruns only this fragment until a row is added"""
+    with st.expander("➕ Quick Add Family Member"):
+        with st.form("add_member_form"):
+            c1, c2, c3 = st.columns(3)
+            new_name = c1.text_input("Full Name")
+            new_parent = c2.selectbox("Parent", [""] + sorted_member_names(tuple(st.session_state.df['Name'].dropna().astype(str))))
+            new_gender = c3.selectbox("Gender", ["Male", "Female", "Unknown"])
+
+            c4, c5, c6 = st.columns(3)
+            new_birth = c4.number_input("Birth Year", min_value=1700, max_value=2025, value=None, placeholder="YYYY")
+            new_death = c5.number_input("Death Year", min_value=1700, max_value=2025, value=None, placeholder="Living")
+            new_location = c6.text_input("Location")
+
+            new_photo = st.text_input("Photo URL (optional)")
+
+            if st.form_submit_button("Add Member"):
+                if new_name:
+                    new_row = {
+                        "Name": new_name,
+                        "Parent": new_parent if new_parent else None,
+                        "Birth": new_birth,
+                        "Death": new_death,
+                        "Location": new_location,
+                        "Gender": new_gender,
+                        "Photo": new_photo,
+                        "Generation": 1,  # Placeholder, will be auto-calculated
+                        "Highlight": False
+                    }
+                    st.session_state.df = pd.concat([st.session_state.df, pd.DataFrame([new_row])], ignore_index=True)
+                    st.success(f"Added {new_name}!")
+                    st.rerun()
+                else:
+                    st.error("Name is required!")
+
+
 with tab1:
     col1, col2 = st.columns([3, 1])
 
@@ -240,54 +385,36 @@ with tab1:
         }
 
         # Add "Quick Add" expandable form
-        with st.expander("➕ Quick Add Family Member"):
-            with st.form("add_member_form"):
-                c1, c2, c3 = st.columns(3)
-                new_name = c1.text_input("Full Name")
-                new_parent = c2.selectbox("Parent", [""] + sorted(st.session_state.df['Name'].astype(str).unique().tolist()))
-                new_gender = c3.selectbox("Gender", ["Male", "Female", "Unknown"])
-
-                c4, c5, c6 = st.columns(3)
-                new_birth = c4.number_input("Birth Year", min_value=1700, max_value=2025, value=None, placeholder="YYYY")
-                new_death = c5.number_input("Death Year", min_value=1700, max_value=2025, value=None, placeholder="Living")
-                new_location = c6.text_input("Location")
-
-                new_photo = st.text_input("Photo URL (optional)")
-
-                if st.form_submit_button("Add Member"):
-                    if new_name:
-                        new_row = {
-                            "Name": new_name,
-                            "Parent": new_parent if new_parent else None,
-                            "Birth": new_birth,
-                            "Death": new_death,
-                            "Location": new_location,
-                            "Gender": new_gender,
-                            "Photo": new_photo,
-                            "Generation": 1,  # Placeholder, will be auto-calculated
-                            "Highlight": False
-                        }
-                        st.session_state.df = pd.concat([st.session_state.df, pd.DataFrame([new_row])], ignore_index=True)
-                        st.success(f"Added {new_name}!")
-                        st.rerun()
-                    else:
-                        st.error("Name is required!")
-
-        edited_df = st.data_editor(
-            st.session_state.df,
-            column_config=column_config,
-            num_rows="dynamic",
-            use_container_width=True,
-            hide_index=True,
-            key="data_editor"
-        )
+        render_quick_add()
+
+        # Show a lightweight read-only table unless the user is editing
+        edit_mode = st.toggle("✏️ Edit mode", value=False, key="edit_mode", on_change=commit_table_edits)
+        if edit_mode:
+            edited_df = st.data_editor(
+                st.session_state.df,
+                column_config=column_config,
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                key="data_editor"
+            )
+            st.session_state.edited_df = edited_df
+        else:
+            edited_df = st.session_state.df
+            # Send the browser one page of rows at a time once the tree outgrows a page
+            visible_rows = edited_df
+            page_count = -(-len(edited_df) // _TABLE_PAGE_SIZE)
+            if page_count > 1:
+                page = st.number_input("Page", min_value=1, max_value=page_count, value=1, key="table_page")
+                visible_rows = edited_df.iloc[(page - 1) * _TABLE_PAGE_SIZE:page * _TABLE_PAGE_SIZE]
+            st.dataframe(visible_rows, column_config=column_config, use_container_width=True, hide_index=True)
 
         # Auto-calculate generations button
         if st.button("🔢 Auto-Calculate Generations"):
             gen_map = calculate_generation(edited_df)
-            for idx, row in edited_df.iterrows():
-                if row['Name'] in gen_map:
-                    edited_df.at[idx, 'Generation'] = gen_map[row['Name']]
+            new_generations = edited_df['Name'].map(gen_map)
+            calculated = new_generations.notna()
+            edited_df.loc[calculated, 'Generation'] = new_generations[calculated]
             st.session_state.df = edited_df
             st.rerun()
         
@@ -315,9 +442,11 @@ st.sidebar.subheader("Color Scheme")
 # Generation-based coloring option
 color_by = st.sidebar.radio("Color nodes by:", ["Generation", "Highlight", "Gender", "Location"])
 
+highlight_color = "#E8B04B"  # Warm gold
+default_color = "#8FA4B1"  # Muted blue-gray
 if color_by == "Highlight":
-    highlight_color = st.sidebar.color_picker("Highlight Color", "#E8B04B")  # Warm gold
-    default_color = st.sidebar.color_picker("Default Node Color", "#8FA4B1")  # Muted blue-gray
+    highlight_color = st.sidebar.color_picker("Highlight Color", highlight_color)
+    default_color = st.sidebar.color_picker("Default Node Color", default_color)
 
 # Professional background colors
 bg_color = st.sidebar.color_picker("Background Color", "#FAFAFA")  # Off-white for better readability
@@ -337,169 +466,159 @@ show_generation = st.sidebar.checkbox("Show Generation Number", value=True)
 node_size_by_descendants = st.sidebar.checkbox("Size nodes by number of descendants", value=False)
 text_size = st.sidebar.slider("Text Size", 10, 28, 16, step=2)
 
+
+class VizSettings(NamedTuple):
+    """Sidebar values passed to generate_graph_html"""
+    bg_color: str
+    edge_color: str
+    text_size: int
+    color_by: str
+    highlight_color: str
+    default_color: str
+    show_lifespan: bool
+    show_generation: bool
+    node_size_by_descendants: bool
+
+
+viz_settings = VizSettings(
+    bg_color, edge_color, text_size, color_by, highlight_color, default_color,
+    show_lifespan, show_generation, node_size_by_descendants
+)
+
 # --- 4. Enhanced Graph Generation Logic ---
-def count_descendants(df, person_name):
-    """Count all descendants of a person"""
-    descendants = set()
-    to_check = [person_name]
-    
-    while to_check:
-        current = to_check.pop()
-        children = df[df['Parent'] == current]['Name'].tolist()
-        for child in children:
-            if child not in descendants:
-                descendants.add(child)
-                to_check.append(child)
-    
-    return len(descendants)
+def count_all_descendants(children_idx, names):
+    """Count all descendants of each person in names using a prebuilt children index.
+
+    Names are settled bottom-up (leaves first), each one reusing the finished
+    sets of its children, so every edge is followed once. Names repeat in the
+    data, so descendants are unioned as sets rather than summed. Anyone left
+    unsettled sits in or above a name cycle and is walked directly."""
+    graph = {parent: set(kids) for parent, kids in children_idx.items()}
+    parents_of = collections.defaultdict(set)
+    for parent, kids in graph.items():
+        for child in kids:
+            parents_of[child].add(parent)
+
+    unsettled = {name: len(graph.get(name, ())) for name in set(names).union(graph, parents_of)}
+    ready = collections.deque(name for name, left in unsettled.items() if left == 0)
+    settled = {}
+    while ready:
+        current = ready.popleft()
+        descendants = set()
+        for child in graph.get(current, ()):
+            descendants.add(child)
+            descendants |= settled[child]
+        settled[current] = descendants
+        for parent in parents_of[current]:
+            unsettled[parent] -= 1
+            if unsettled[parent] == 0:
+                ready.append(parent)
+
+    counts = {}
+    for person_name in names:
+        if person_name in counts:
+            continue
+        if person_name in settled:
+            counts[person_name] = len(settled[person_name])
+            continue
+        descendants = set()
+        to_check = [person_name]
+        while to_check:
+            current = to_check.pop()
+            for child in graph.get(current, ()):
+                if child not in descendants:
+                    descendants.add(child)
+                    if child in settled:
+                        descendants |= settled[child]
+                    else:
+                        to_check.append(child)
+        counts[person_name] = len(descendants)
+    return counts
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def descendant_counts(df):
+    """Descendant counts for every member, built once per dataframe version and
+    shared by the tree visualization and the Statistics tab"""
+    # Name and Parent share one set of integer codes; a missing parent is -1
+    codes, uniques = pd.factorize(pd.concat([df['Name'], df['Parent']], ignore_index=True))
+    name_ids, parent_ids = codes[:len(df)].tolist(), codes[len(df):].tolist()
+    children_idx = collections.defaultdict(list)
+    for parent, child in zip(parent_ids, name_ids):
+        if parent >= 0:
+            children_idx[parent].append(child)
+
+    counts = count_all_descendants(children_idx, name_ids)
+    return {uniques[code]: count for code, count in counts.items() if code >= 0}
+
+# Professional genealogical color palettes (read-only, shared by every render)
+
+# Warm earth tones for generations (commonly used in genealogy)
+_GENERATION_COLORS = MappingProxyType({
+    1: "#8B4513",  # Saddle Brown - oldest generation
+    2: "#A0522D",  # Sienna
+    3: "#BC8F8F",  # Rosy Brown
+    4: "#CD853F",  # Peru
+    5: "#DEB887",  # Burlewood
+    6: "#F4A460",  # Sandy Brown
+    7: "#FFE4B5",  # Moccasin - youngest generation
+    8: "#FFDEAD",  # Navajo White
+    9: "#FFE4C4"   # Bisque
+})
+
+# Subtle, professional gender colors
+_GENDER_COLORS = MappingProxyType({
+    "Male": "#6B8CAE",    # Muted steel blue
+    "Female": "#D4A5A5",  # Dusty rose
+    "Unknown": "#C0C0C0"  # Silver gray
+})
+
+# Geographical colors with better harmony
+_LOCATION_COLORS = MappingProxyType({
+    "Israel": "#5B8FA8",     # Teal blue
+    "USA": "#9B7653",        # Tan brown
+    "Brazil": "#8FA068",     # Sage green
+    "Unknown": "#A8A8A8",    # Medium gray
+    "Europe": "#7D6B91",     # Muted purple
+    "Asia": "#C17E61",       # Terra cotta
+    "Africa": "#7A9A65"      # Olive green
+})
+
+# One anchored alternative per location keyword, tried in dict order, so the
+# first keyword found anywhere in the text wins (same priority as a key loop)
+_LOCATION_RE = re.compile(
+    "|".join(f".*?({re.escape(key)})" for key in _LOCATION_COLORS), re.IGNORECASE | re.DOTALL
+)
+_LOCATION_LOOKUP = {key.lower(): color for key, color in _LOCATION_COLORS.items()}
 
-def get_node_color(row, color_by, highlight_color="#E8B04B", default_color="#8FA4B1"):
-    """Determine node color based on selected criteria"""
-    # Professional genealogical color palettes
-    
-    # Warm earth tones for generations (commonly used in genealogy)
-    generation_colors = {
-        1: "#8B4513",  # Saddle Brown - oldest generation
-        2: "#A0522D",  # Sienna
-        3: "#BC8F8F",  # Rosy Brown
-        4: "#CD853F",  # Peru
-        5: "#DEB887",  # Burlewood
-        6: "#F4A460",  # Sandy Brown
-        7: "#FFE4B5",  # Moccasin - youngest generation
-        8: "#FFDEAD",  # Navajo White
-        9: "#FFE4C4"   # Bisque
-    }
-    
-    # Subtle, professional gender colors
-    gender_colors = {
-        "Male": "#6B8CAE",    # Muted steel blue
-        "Female": "#D4A5A5",  # Dusty rose
-        "Unknown": "#C0C0C0"  # Silver gray
-    }
-    
-    # Geographical colors with better harmony
-    location_colors = {
-        "Israel": "#5B8FA8",     # Teal blue
-        "USA": "#9B7653",        # Tan brown
-        "Brazil": "#8FA068",     # Sage green
-        "Unknown": "#A8A8A8",    # Medium gray
-        "Europe": "#7D6B91",     # Muted purple
-        "Asia": "#C17E61",       # Terra cotta
-        "Africa": "#7A9A65"      # Olive green
-    }
-    
+def compute_colors(df, color_by, highlight_color="#E8B04B", default_color="#8FA4B1"):
+    """Determine node colors for every row based on selected criteria"""
     if color_by == "Generation":
-        gen = row.get('Generation', 1)
-        return generation_colors.get(gen, "#DEB887")  # Default to a middle generation color
+        gens = df['Generation'] if 'Generation' in df else pd.Series(1, index=df.index)
+        return gens.map(_GENERATION_COLORS).fillna("#DEB887")  # Default to a middle generation color
     elif color_by == "Gender":
-        return gender_colors.get(row.get('Gender', 'Unknown'), "#C0C0C0")
+        genders = df['Gender'] if 'Gender' in df else pd.Series("Unknown", index=df.index)
+        return genders.map(_GENDER_COLORS).fillna("#C0C0C0")
     elif color_by == "Location":
-        loc = row.get('Location', 'Unknown')
-        # Try to match location keywords
-        for key in location_colors:
-            if key.lower() in str(loc).lower():
-                return location_colors[key]
-        return location_colors.get('Unknown')
+        locs = df['Location'] if 'Location' in df else pd.Series("Unknown", index=df.index)
+        # Try to match location keywords; each keyword has its own capture group
+        matched = locs.astype(str).str.extract(_LOCATION_RE).bfill(axis=1).iloc[:, 0]
+        # No match at all leaves a float NaN column, so go through object before .str
+        return matched.astype(object).str.lower().map(_LOCATION_LOOKUP).fillna(_LOCATION_COLORS['Unknown'])
     else:  # Highlight
-        return highlight_color if row.get('Highlight', False) else default_color
+        flags = df['Highlight'] if 'Highlight' in df else pd.Series(False, index=df.index)
+        highlighted = flags.notna() & flags.astype(bool)
+        return pd.Series(np.where(highlighted, highlight_color, default_color), index=df.index)
 
-def generate_graph_html(dataframe):
-    """Generate the interactive family tree visualization using D3.js"""
-    # Determine font color based on background brightness
-    bg_brightness = int(bg_color[1:3], 16) + int(bg_color[3:5], 16) + int(bg_color[5:7], 16)
-    font_color = "#2C3E50" if bg_brightness > 384 else "#ECEFF1"
+def _clean_text(values):
+    """Stripped string form of a column, with missing values as empty strings"""
+    return values.where(values.notna(), "").astype(str).str.strip()
 
-    # Calculate descendants for sizing if needed
-    descendants_count = {}
-    if node_size_by_descendants:
-        for _, row in dataframe.iterrows():
-            descendants_count[row['Name']] = count_descendants(dataframe, row['Name'])
-
-    # Build nodes array
-    nodes = []
-    node_ids = {}
-    for idx, row in dataframe.iterrows():
-        node_name = str(row['Name']).strip() if pd.notna(row['Name']) else ""
-        if not node_name:
-            continue
-
-        node_ids[node_name] = len(nodes)
-
-        # Create detailed tooltip
-        birth = f"{int(row['Birth'])}" if pd.notna(row['Birth']) else "?"
-        death = f"{int(row['Death'])}" if pd.notna(row['Death']) else "Living"
-        age = f" (Age: {int(row['Death']) - int(row['Birth'])})" if pd.notna(row['Birth']) and pd.notna(row['Death']) else ""
-
-        tooltip_parts = [node_name]
-        if pd.notna(row.get('Gender')):
-            tooltip_parts.append(f"Gender: {row['Gender']}")
-        tooltip_parts.append(f"Born: {birth}")
-        tooltip_parts.append(f"Died: {death}{age}")
-        if pd.notna(row.get('Location')):
-            tooltip_parts.append(f"Location: {row['Location']}")
-        if pd.notna(row.get('Spouse')):
-            tooltip_parts.append(f"Spouse: {row['Spouse']}")
-        if show_generation and pd.notna(row.get('Generation')):
-            tooltip_parts.append(f"Generation: {int(row['Generation'])}")
-
-        tooltip = "\\n".join(tooltip_parts)
-
-        # Create label
-        label_parts = [node_name]
-        if show_lifespan:
-            label_parts.append(f"({birth}-{death})")
-        if show_generation and pd.notna(row.get('Generation')):
-            label_parts.append(f"Gen {int(row['Generation'])}")
-
-        # Determine node size
-        if node_size_by_descendants:
-            size = 8 + min(descendants_count.get(node_name, 0) * 2, 30)
-        else:
-            size = 12
+def _tooltip_line(label, values):
+    """Format an optional tooltip line per row, empty where the value is missing"""
+    return ("\\n" + label + ": " + values.astype(str)).where(values.notna(), "")
 
-        # Get node color
-        if color_by == "Highlight" and 'highlight_color' in globals() and 'default_color' in globals():
-            color = get_node_color(row, color_by, highlight_color, default_color)
-        else:
-            color = get_node_color(row, color_by)
-
-        # Get generation for Y positioning
-        gen = int(row.get('Generation', 1)) if pd.notna(row.get('Generation')) else 1
-
-        # Get spouse info
-        spouse = str(row.get('Spouse', '')).strip() if pd.notna(row.get('Spouse')) else ""
-
-        node = {
-            "id": node_name,
-            "name": node_name,
-            "label": label_parts,
-            "tooltip": tooltip,
-            "color": color,
-            "size": size,
-            "gender": row.get('Gender', 'Unknown'),
-            "generation": gen,
-            "spouse": spouse
-        }
-        nodes.append(node)
-
-    # Build links array
-    links = []
-    for _, row in dataframe.iterrows():
-        node_name = str(row['Name']).strip() if pd.notna(row['Name']) else ""
-        parent_name = str(row['Parent']).strip() if pd.notna(row['Parent']) else ""
-
-        if node_name and parent_name and parent_name.lower() not in ["none", ""] and node_name in node_ids and parent_name in node_ids:
-            links.append({
-                "source": parent_name,
-                "target": node_name,
-                "type": "parent"
-            })
-
-    # Generate the complete HTML with D3.js
-    nodes_json = json.dumps(nodes)
-    links_json = json.dumps(links)
-
-    html = f'''<!DOCTYPE html>
+# D3.js page for the family tree, filled in by generate_graph_html via str.format
+_GRAPH_HTML_TEMPLATE = '''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
@@ -512,7 +631,7 @@ def generate_graph_html(dataframe):
         .node ellipse {{ stroke: #333; stroke-width: 2px; }}
         .node rect {{ stroke: #333; stroke-width: 2px; }}
         .node text {{ font-family: Arial, sans-serif; font-size: {text_size}px; fill: #000000; font-weight: bold; pointer-events: none; text-shadow: 1px 1px 0 #fff, -1px -1px 0 #fff, 1px -1px 0 #fff, -1px 1px 0 #fff; }}
-        .node .spouse-text {{ font-size: {max(10, text_size - 4)}px; fill: #C41E3A; font-style: italic; font-weight: normal; }}
+        .node .spouse-text {{ font-size: {spouse_text_size}px; fill: #C41E3A; font-style: italic; font-weight: normal; }}
         .link {{ fill: none; stroke: {edge_color}; stroke-width: 2px; }}
         .tooltip {{ position: absolute; background: rgba(0,0,0,0.9); color: white; padding: 10px 14px; border-radius: 6px; font-size: 14px; pointer-events: none; white-space: pre-line; max-width: 300px; z-index: 1000; }}
     </style>
@@ -520,8 +639,17 @@ def generate_graph_html(dataframe):
 <body>
     <svg id="tree"></svg>
     <script>
-        const nodes = {nodes_json};
-        const links = {links_json};
+        // Nodes and links arrive as one array per field; rebuild per-item objects once
+        const nodeColumns = {nodes_json};
+        const linkColumns = {links_json};
+        const nodes = nodeColumns.id.map((id, i) => ({{
+            id, name: id, label: nodeColumns.label[i], tooltip: nodeColumns.tooltip[i],
+            color: nodeColumns.color[i], size: nodeColumns.size[i], gender: nodeColumns.gender[i],
+            generation: nodeColumns.generation[i], spouse: nodeColumns.spouse[i]
+        }}));
+        const links = linkColumns.source.map((source, i) => ({{
+            source, target: linkColumns.target[i], type: "parent"
+        }}));
 
         // Calculate dynamic width based on largest generation
         const generations = {{}};
@@ -696,10 +824,109 @@ def generate_graph_html(dataframe):
     </script>
 </body>
 </html>'''
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def generate_graph_html(dataframe, bg_color, edge_color, text_size, color_by, highlight_color, default_color,
+                        show_lifespan, show_generation, node_size_by_descendants):
+    """Generate the interactive family tree visualization using D3.js
+
+    All visualization settings are passed explicitly so the returned HTML can be
+    cached on the dataframe contents plus the sidebar values.
+    """
+    # Calculate descendants for sizing if needed
+    descendants_count = {}
+    if node_size_by_descendants:
+        descendants_count = descendant_counts(dataframe)
+
+    # Precompute display strings for every member in one vectorized pass
+    optional = dataframe.reindex(columns=['Gender', 'Location', 'Spouse', 'Generation'])
+    names = _clean_text(dataframe['Name'])
+    parents = _clean_text(dataframe['Parent'])
+
+    birth_known = dataframe['Birth'].notna()
+    death_known = dataframe['Death'].notna()
+    birth_years = dataframe['Birth'].where(birth_known, 0).astype(int)
+    death_years = dataframe['Death'].where(death_known, 0).astype(int)
+    birth = birth_years.astype(str).where(birth_known, "?")
+    death = death_years.astype(str).where(death_known, "Living")
+    age = (" (Age: " + (death_years - birth_years).astype(str) + ")").where(birth_known & death_known, "")
+
+    gen_known = optional['Generation'].notna()
+    gens = optional['Generation'].where(gen_known, 1).astype(int)
+    gen_known &= show_generation
+
+    # Create detailed tooltip
+    tooltips = (
+        names
+        + _tooltip_line("Gender", optional['Gender'])
+        + "\\nBorn: " + birth
+        + "\\nDied: " + death + age
+        + _tooltip_line("Location", optional['Location'])
+        + _tooltip_line("Spouse", optional['Spouse'])
+        + ("\\nGeneration: " + gens.astype(str)).where(gen_known, "")
+    )
+
+    # Determine node size
+    if node_size_by_descendants:
+        sizes = 8 + (names.map(descendants_count).fillna(0).astype(int) * 2).clip(upper=30)
+    else:
+        sizes = pd.Series(12, index=dataframe.index)
+
+    # Create label
+    gen_labels = ("Gen " + gens.astype(str)).where(gen_known, "")
+    label_columns = [names] + (["(" + birth + "-" + death + ")"] if show_lifespan else []) + [gen_labels]
+    labels = pd.Series(
+        [[part for part in parts if part] for parts in zip(*label_columns)], index=dataframe.index, dtype=object
+    )
+
+    # Build node columns in one batch; the page rebuilds per-node objects (name mirrors id)
+    prepared = pd.DataFrame({
+        "id": names,
+        "label": labels,
+        "tooltip": tooltips,
+        "color": compute_colors(dataframe, color_by, highlight_color, default_color),
+        "size": sizes,
+        "gender": optional['Gender'],
+        "generation": gens,
+        "spouse": _clean_text(optional['Spouse'])
+    })
+    is_node = (names != "").to_numpy()
+    nodes = prepared[is_node].to_dict('list')
+
+    # Build link columns with one mask: keep parent/child pairs whose parent is also a node
+    names_arr = names.to_numpy()
+    parents_arr = parents.to_numpy()
+    is_link = is_node & (parents.str.lower() != "none").to_numpy() & np.isin(parents_arr, names_arr[is_node])
+    links = {"source": parents_arr[is_link].tolist(), "target": names_arr[is_link].tolist()}
+
+    # Generate the complete HTML with D3.js
+    # orjson emits compact UTF-8 bytes; missing values become null rather than NaN
+    nodes_json = orjson.dumps(nodes).decode('utf-8')
+    links_json = orjson.dumps(links).decode('utf-8')
+
+    html = _GRAPH_HTML_TEMPLATE.format(
+        bg_color=bg_color,
+        edge_color=edge_color,
+        text_size=text_size,
+        spouse_text_size=max(10, text_size - 4),
+        nodes_json=nodes_json,
+        links_json=links_json
+    )
     return html
 
 # --- 5. Render the Graph in Tab 2 ---
-with tab2:
+def session_graph_html(edited_df, settings):
+    """Reuse this session's last render when neither the data nor the settings changed,
+    skipping even the shared cache lookup and the copy of its result"""
+    viz_key = (_DF_HASH_FUNCS[pd.DataFrame](edited_df), settings)
+    if st.session_state.get('viz_key') != viz_key:
+        st.session_state.viz_html = generate_graph_html(edited_df, **settings._asdict())
+        st.session_state.viz_key = viz_key
+    return st.session_state.viz_html
+
+@st.fragment
+def render_viz_tab(edited_df, settings):
+    """Render the Family Tree tab; its own widgets rerun only this fragment"""
     # Center the button
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -715,7 +942,7 @@ with tab2:
         else:
             with st.spinner("🔄 Generating family tree visualization..."):
                 try:
-                    graph_html = generate_graph_html(edited_df)
+                    graph_html = session_graph_html(edited_df, settings)
 
                     # Add search functionality
                     st.subheader("🔍 Search Family Members")
@@ -739,174 +966,308 @@ with tab2:
 
                 except Exception as e:
                     st.error(f"Error generating visualization: {str(e)}")
+
+with tab2:
+    render_viz_tab(edited_df, viz_settings)
+
 # --- 6. Statistics Tab ---
-with tab3:
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def summary_metrics(df):
+    """Headline numbers for the Statistics tab, scanning each column once"""
+    gender_counts = df['Gender'].value_counts()
+    location_counts = df['Location'].value_counts()
+    return {
+        "total": len(df),
+        "living": int(df['Death'].isna().sum()),
+        "generations": int(df['Generation'].max()) if 'Generation' in df else "N/A",
+        # Missing Birth or Death gives NaN, which mean() skips
+        "avg_lifespan": (df['Death'] - df['Birth']).mean(),
+        "males": int(gender_counts.get('Male', 0)),
+        "females": int(gender_counts.get('Female', 0)),
+        "top_location": location_counts.index[0] if len(location_counts) > 0 else "N/A",
+        "unique_locations": len(location_counts),
+    }
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def generation_breakdown(df):
+    """Member count and birth-year range per generation from one built-in groupby"""
+    grouped = df.groupby('Generation').agg(
+        Count=('Name', 'count'), earliest=('Birth', 'min'), latest=('Birth', 'max')
+    )
+    known = grouped['earliest'].notna()
+    earliest = grouped['earliest'].where(known, 0).map('{:.0f}'.format)
+    latest = grouped['latest'].where(known, 0).map('{:.0f}'.format)
+    years = earliest + "-" + latest
+    return grouped[['Count']].assign(**{'Birth Year Range': years.where(known, "N/A")})
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def compute_branch_df(df):
+    """Family branches: Generation 1-2 members with descendants, with their birth years"""
+    early_gen = df.loc[df['Generation'] <= 2, 'Name']
+    # Counts come from the same batched pass as the tree's node sizes
+    early_counts = early_gen.map(descendant_counts(df)).fillna(0).astype(int)
+    has_branch = (early_counts > 0).to_numpy()
+    # Columns go in as typed arrays: object names, int64 counts, float64 years with NaN
+    branch_names = early_gen[has_branch]
+    branch_births = pd.to_numeric(birth_by_name(df).reindex(branch_names), errors='coerce')
+    return pd.DataFrame({
+        'Ancestor': branch_names.to_numpy(dtype=object),
+        'Descendants': early_counts[has_branch].to_numpy(dtype=np.int64),
+        'Birth Year': branch_births.to_numpy(dtype=np.float64, na_value=np.nan)
+    })
+
+@st.fragment
+def render_statistics_tab(edited_df):
+    """Render the Statistics tab from the cached metric helpers"""
     st.subheader("📊 Family Tree Statistics & Analysis")
-    
+
     if not edited_df.empty:
+        metrics = summary_metrics(edited_df)
+
         # Basic statistics
         col1, col2, col3, col4 = st.columns(4)
-        
+    
         with col1:
-            st.metric("👥 Total Members", len(edited_df))
-            st.metric("🎯 Living Members", len(edited_df[edited_df['Death'].isna()]))
-        
+            st.metric("👥 Total Members", metrics["total"])
+            st.metric("🎯 Living Members", metrics["living"])
+    
         with col2:
-            st.metric("🔢 Generations", int(edited_df['Generation'].max()) if 'Generation' in edited_df else "N/A")
-            avg_lifespan = edited_df[edited_df['Death'].notna()].apply(
-                lambda x: x['Death'] - x['Birth'] if pd.notna(x['Birth']) else None, axis=1
-            ).mean()
+            st.metric("🔢 Generations", metrics["generations"])
+            avg_lifespan = metrics["avg_lifespan"]
             st.metric("📅 Avg Lifespan", f"{avg_lifespan:.0f} years" if pd.notna(avg_lifespan) else "N/A")
-        
+    
         with col3:
-            male_count = len(edited_df[edited_df['Gender'] == 'Male'])
-            female_count = len(edited_df[edited_df['Gender'] == 'Female'])
-            st.metric("👨 Males", male_count)
-            st.metric("👩 Females", female_count)
-        
+            st.metric("👨 Males", metrics["males"])
+            st.metric("👩 Females", metrics["females"])
+    
         with col4:
-            locations = edited_df['Location'].value_counts().head(3)
-            st.metric("📍 Top Location", locations.index[0] if len(locations) > 0 else "N/A")
-            st.metric("🌍 Unique Locations", edited_df['Location'].nunique())
-        
+            st.metric("📍 Top Location", metrics["top_location"])
+            st.metric("🌍 Unique Locations", metrics["unique_locations"])
+    
         st.markdown("---")
-        
+    
         # Generation breakdown
         st.subheader("Generation Analysis")
-        gen_df = edited_df.groupby('Generation').agg({
-            'Name': 'count',
-            'Birth': lambda x: f"{x.min():.0f}-{x.max():.0f}" if x.notna().any() else "N/A"
-        }).rename(columns={'Name': 'Count', 'Birth': 'Birth Year Range'})
-        
+        gen_df = generation_breakdown(edited_df)
+    
         col1, col2 = st.columns(2)
         with col1:
             st.dataframe(gen_df, use_container_width=True)
-        
+    
         with col2:
             # Create a simple bar chart using Streamlit
-            if 'Generation' in edited_df.columns:
-                gen_counts = edited_df['Generation'].value_counts().sort_index()
-                st.bar_chart(gen_counts)
-        
+            st.bar_chart(gen_df['Count'])
+    
         # Family branches analysis
         st.subheader("Family Branches")
-        
-        # Find family branches (children of Generation 1-2)
-        early_gen = edited_df[edited_df['Generation'] <= 2]['Name'].tolist()
-        branch_data = []
-        
-        for ancestor in early_gen:
-            descendants = count_descendants(edited_df, ancestor)
-            if descendants > 0:
-                branch_data.append({
-                    'Ancestor': ancestor,
-                    'Descendants': descendants,
-                    'Birth Year': edited_df[edited_df['Name'] == ancestor]['Birth'].values[0] if len(edited_df[edited_df['Name'] == ancestor]) > 0 else None
-                })
-        
-        if branch_data:
-            branch_df = pd.DataFrame(branch_data)
+    
+        branch_df = compute_branch_df(edited_df)
+        if not branch_df.empty:
             st.dataframe(branch_df, use_container_width=True)
     else:
         st.info("📝 Please add family data in the Data Entry tab to see statistics.")
 
+with tab3:
+    render_statistics_tab(edited_df)
+
 # --- 7. Help Tab ---
-with tab4:
+# Static help text shown in the Help tab
+_HELP_MD = """
+### Getting Started
+
+1. **Data Entry Tab** 📝
+   - Turn on "✏️ Edit mode" to change the table; switching it off keeps your edits
+   - Add new family members by clicking the "+" button in the data table
+   - Fill in all available information for accuracy
+   - Use the "Auto-Calculate Generations" button to automatically number generations
+   - Parent names must match exactly (case-sensitive)
+
+2. **Family Tree Tab** 🌳
+   - Click "Generate/Update Family Tree Visualization" to create the tree
+   - Drag nodes to rearrange the layout
+   - Scroll to zoom in/out
+   - Click on nodes to see detailed information
+   - Different shapes represent genders (square=male, circle=female, box=unknown)
+
+3. **Statistics Tab** 📊
+   - View comprehensive family statistics
+   - Analyze generation patterns
+   - See family branch breakdowns
+
+### Data Fields Explained
+
+- **Name**: Full name of the person
+- **Parent**: Name of one parent (must match exactly)
+- **Birth/Death**: Year of birth and death (leave Death empty for living persons)
+- **Gender**: Male, Female, or Unknown
+- **Location**: Birth location or primary residence
+- **Spouse**: Name of spouse (optional)
+- **Occupation**: Primary occupation (optional)
+- **Generation**: Generational level (1 = oldest ancestors)
+- **Highlight**: Check to highlight in yellow
+- **Notes**: Any additional information
+
+### Tips for Genealogists
+
+- 🔍 **Research Tips**: Start with what you know and work backwards
+- 📅 **Date Validation**: The system checks for logical date consistency
+- 🌍 **Location Tracking**: Include countries/cities for migration patterns
+- 👥 **Relationship Mapping**: Currently supports parent-child and spouse relationships
+- 📝 **Documentation**: Use the Notes field for sources and references
+
+### Color Coding Options
+
+- **By Generation**: Each generation gets a different color
+- **By Gender**: Blue for males, pink for females, gray for unknown
+- **By Location**: Different colors for different locations
+- **By Highlight**: Manual highlighting for important individuals
+
+### Export and Import
+
+- Use the sidebar download buttons to save your work as CSV, JSON or Feather
+- Use "📤 Upload Family Data" in the sidebar to load a CSV, JSON, Feather, Arrow or Parquet file; it replaces the current table
+- Regular backups are recommended
+"""
+
+@st.fragment
+def render_help_tab():
+    """Render the static Help tab"""
     st.subheader("ℹ️ How to Use This Family Tree System")
     
-    st.markdown("""
-    ### Getting Started
-    
-    1. **Data Entry Tab** 📝
-       - Add new family members by clicking the "+" button in the data table
-       - Fill in all available information for accuracy
-       - Use the "Auto-Calculate Generations" button to automatically number generations
-       - Parent names must match exactly (case-sensitive)
-    
-    2. **Family Tree Tab** 🌳
-       - Click "Generate/Update Family Tree Visualization" to create the tree
-       - Drag nodes to rearrange the layout
-       - Scroll to zoom in/out
-       - Click on nodes to see detailed information
-       - Different shapes represent genders (square=male, circle=female, box=unknown)
-    
-    3. **Statistics Tab** 📊
-       - View comprehensive family statistics
-       - Analyze generation patterns
-       - See family branch breakdowns
-    
-    ### Data Fields Explained
-    
-    - **Name**: Full name of the person
-    - **Parent**: Name of one parent (must match exactly)
-    - **Birth/Death**: Year of birth and death (leave Death empty for living persons)
-    - **Gender**: Male, Female, or Unknown
-    - **Location**: Birth location or primary residence
-    - **Spouse**: Name of spouse (optional)
-    - **Occupation**: Primary occupation (optional)
-    - **Generation**: Generational level (1 = oldest ancestors)
-    - **Highlight**: Check to highlight in yellow
-    - **Notes**: Any additional information
-    
-    ### Tips for Genealogists
-    
-    - 🔍 **Research Tips**: Start with what you know and work backwards
-    - 📅 **Date Validation**: The system checks for logical date consistency
-    - 🌍 **Location Tracking**: Include countries/cities for migration patterns
-    - 👥 **Relationship Mapping**: Currently supports parent-child and spouse relationships
-    - 📝 **Documentation**: Use the Notes field for sources and references
-    
-    ### Color Coding Options
-    
-    - **By Generation**: Each generation gets a different color
-    - **By Gender**: Blue for males, pink for females, gray for unknown
-    - **By Location**: Different colors for different locations
-    - **By Highlight**: Manual highlighting for important individuals
-    
-    ### Export and Import
-    
-    - Use the sidebar download button to save your work as CSV
-    - Import CSV files by copying data into the table
-    - Regular backups are recommended
-    """)
+    st.markdown(_HELP_MD)
+
+with tab4:
+    render_help_tab()
 
 # --- 8. Export Data Option in Sidebar ---
-st.sidebar.markdown("---")
-st.sidebar.header("💾 Data Management")
-
-# Save as CSV
-csv = edited_df.to_csv(index=False).encode('utf-8')
-st.sidebar.download_button(
-    "📥 Download as CSV",
-    csv,
-    "ascher_family_tree.csv",
-    "text/csv",
-    key='download-csv'
-)
+# Columns with few distinct values, written as Arrow dictionaries in Feather exports
+_DICTIONARY_COLUMNS = ('Gender', 'Location')
+
+@st.cache_resource
+def _export_pool():
+    """Worker threads shared across reruns and sessions; Arrow's CSV and Feather
+    writers release the GIL, so they run beside the JSON encode"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+def _arrow_csv_bytes(table):
+    """CSV through pyarrow's C++ writer"""
+    buf = pa.BufferOutputStream()
+    pacsv.write_csv(table, buf)
+    return buf.getvalue().to_pybytes()
+
+def _pandas_csv_bytes(df):
+    """CSV through pandas for tables Arrow cannot type or write, UTF-8 straight into a byte buffer"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding='utf-8')
+    return buf.getvalue()
+
+def _feather_bytes(table):
+    """zstd Feather, with low-cardinality text columns stored dictionary-encoded in the file only"""
+    for col in _DICTIONARY_COLUMNS:
+        # An all-empty column arrives as Arrow null type, which cannot be read back as a dictionary
+        if col in table.column_names and (pa.types.is_string(table[col].type) or pa.types.is_large_string(table[col].type)):
+            table = table.set_column(table.column_names.index(col), col, table[col].dictionary_encode())
+    buf = pa.BufferOutputStream()
+    feather.write_feather(table, buf, compression='zstd')
+    return buf.getvalue().to_pybytes()
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs=_DF_HASH_FUNCS)
+def _export_bytes(df):
+    """Serialize the family table to CSV, JSON records and Feather, once per data change;
+    all payloads share one cache entry so each rerun hashes the table only once"""
+    # Arrow needs one type per column; hand-edited cells can mix them, so it is optional
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, ValueError):
+        table = None
 
-# Save as JSON (more structured)
-json_data = edited_df.to_json(orient='records', indent=2)
-st.sidebar.download_button(
-    "📥 Download as JSON",
-    json_data,
-    "ascher_family_tree.json",
-    "application/json",
-    key='download-json'
-)
+    if table is not None:
+        csv_job = _export_pool().submit(_arrow_csv_bytes, table)
+        feather_job = _export_pool().submit(_feather_bytes, table)
 
-# Upload data option
-st.sidebar.markdown("---")
-uploaded_file = st.sidebar.file_uploader("📤 Upload Family Data", type=['csv', 'json'])
+    # orjson writes missing values as null, like to_json, and passes any numpy scalars through
+    records = orjson.dumps(df.to_dict(orient='records'), option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
 
-if uploaded_file is not None:
+    if table is None:
+        return _pandas_csv_bytes(df), records, None
+    # Nested cells (lists, dicts) type fine but the writers can still reject them;
+    # CSV then falls back to pandas and the Feather download is left out
     try:
-        if uploaded_file.name.endswith('.csv'):
-            new_df = pd.read_csv(uploaded_file)
-        else:
-            new_df = pd.read_json(uploaded_file)
-        
-        st.session_state.df = new_df
-        st.sidebar.success("✅ Data loaded successfully!")
-        st.rerun()
-    except Exception as e:
-        st.sidebar.error(f"Error loading file: {str(e)}")
+        csv = csv_job.result()
+    except pa.ArrowException:
+        csv = _pandas_csv_bytes(df)
+    try:
+        feather_data = feather_job.result()
+    except pa.ArrowException:
+        feather_data = None
+    return csv, records, feather_data
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def parse_uploaded_table(data):
+    """Parse an uploaded Parquet, Feather, JSON or CSV file, cached in memory by its contents;
+    the format is read from the leading bytes, so a misnamed file still parses first time.
+    Only the 8 most recent parses are retained, and nothing is written to disk."""
+    buffer = io.BytesIO(data)
+    if data.startswith((b'PAR1', b'ARROW1', b'FEA1')):
+        table = pd.read_parquet(buffer) if data.startswith(b'PAR1') else feather.read_feather(buffer)
+        # Decode dictionary columns back to plain values so the editor accepts new entries
+        categorical = table.select_dtypes('category').columns
+        return table.astype({col: table[col].cat.categories.dtype for col in categorical})
+    if data.lstrip()[:1] in (b'{', b'['):
+        return pd.read_json(buffer)
+    return pd.read_csv(buffer, engine='pyarrow')
+
+@st.fragment
+def render_data_management(edited_df):
+    """Sidebar export and upload controls; a download reruns only this fragment"""
+    st.markdown("---")
+    st.header("💾 Data Management")
+
+    csv, json_data, feather_data = _export_bytes(edited_df)
+
+    # Save as CSV
+    st.download_button(
+        "📥 Download as CSV",
+        csv,
+        "ascher_family_tree.csv",
+        "text/csv",
+        key='download-csv'
+    )
+
+    # Save as JSON (more structured)
+    st.download_button(
+        "📥 Download as JSON",
+        json_data,
+        "ascher_family_tree.json",
+        "application/json",
+        key='download-json'
+    )
+
+    # Save as Feather (binary, fastest to load back)
+    if feather_data is not None:
+        st.download_button(
+            "📥 Download as Feather",
+            feather_data,
+            "ascher_family_tree.feather",
+            "application/vnd.apache.arrow.file",
+            key='download-feather'
+        )
+
+    # Upload data option
+    st.markdown("---")
+    uploaded_file = st.file_uploader("📤 Upload Family Data", type=['csv', 'json', 'feather', 'arrow', 'parquet'])
+
+    # Apply each uploaded file once; the uploader keeps returning it on later reruns
+    if uploaded_file is not None and uploaded_file.file_id != st.session_state.get('uploaded_file_id'):
+        try:
+            new_df = parse_uploaded_table(uploaded_file.getvalue())
+            st.session_state.uploaded_file_id = uploaded_file.file_id
+            st.session_state.df = new_df
+            st.success("✅ Data loaded successfully!")
+            # A new table affects every tab, so rerun the whole app rather than the fragment
+            st.rerun()
+        except Exception as e:
+            st.error(f"Error loading file: {str(e)}")
+
+with st.sidebar:
+    render_data_management(edited_df)